@@ -6,6 +6,9 @@ from sqlalchemy import extract
 from werkzeug.utils import secure_filename
 import os
 from sqlalchemy import or_
+from coach_memory import CoachMemory, resolve_intent
+import atexit
+import re
 
 # ---------------- APP SETUP ----------------
 app = Flask(__name__)
@@ -35,100 +38,149 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated
 
+# ---------------- TODAY'S LOG ----------------
+def get_today_log(sess, user_id):
+    # Takes the session explicitly so asgi.py can call it via AsyncSession.run_sync
+    today = date.today()
+
+    log = sess.query(DailyLog).filter_by(user_id=user_id, log_date=today).first()
+    if not log:
+        log = DailyLog(
+            user_id=user_id,
+            log_date=today,
+            steps=0,
+            calories_burned=0,
+            calories_consumed=0
+        )
+        sess.add(log)
+        sess.commit()
+    return log
+
 # =====================================================
 # 🧠 AI COACH LOGIC
 # =====================================================
-def ai_coach_advice(user, profile, log):
+def ai_coach_advice(user, profile, log, intent="general"):
     advice = []
 
-    if log.steps < profile.target_steps:
-        advice.append(f"Walk {profile.target_steps - log.steps} more steps today.")
-    else:
-        advice.append("Great job! You completed your step goal today.")
+    if intent in ("workout", "general"):
+        if log.steps < profile.target_steps:
+            advice.append(f"Walk {profile.target_steps - log.steps} more steps today.")
+        else:
+            advice.append("Great job! You completed your step goal today.")
 
     net = log.calories_consumed - log.calories_burned
 
-    if profile.goal == "lose":
-        advice.append(
-            "You exceeded your calorie limit. Prefer light meals and cardio."
-            if net > profile.target_calories else
-            "You are on track with calories for weight loss."
-        )
-    elif profile.goal == "gain":
-        advice.append(
-            "Increase calories with protein-rich foods."
-            if net < profile.target_calories else
-            "Good calorie intake for muscle gain."
-        )
-    else:
-        advice.append("Maintain balanced meals and regular activity.")
+    if intent in ("diet", "general"):
+        if profile.goal == "lose":
+            advice.append(
+                "You exceeded your calorie limit. Prefer light meals and cardio."
+                if net > profile.target_calories else
+                "You are on track with calories for weight loss."
+            )
+        elif profile.goal == "gain":
+            advice.append(
+                "Increase calories with protein-rich foods."
+                if net < profile.target_calories else
+                "Good calorie intake for muscle gain."
+            )
+        else:
+            advice.append("Maintain balanced meals and regular activity.")
 
     advice.append("Stay consistent. Small daily efforts give big results 💪")
     return advice
 
 # =====================================================
-# 🤖 AI COACH ROUTE
+# 💬 AI COACH MEMORY
 # =====================================================
-@app.route('/ai-coach')
-@login_required
-def ai_coach():
-    user = User.query.get(session['user_id'])
-    profile = user.profile
-    today = date.today()
+COACH_MAX_USERS = int(os.environ.get("COACH_MAX_USERS", 100000))
+COACH_CONTEXT_FILE = os.environ.get("COACH_CONTEXT_FILE")
 
-    log = DailyLog.query.filter_by(user_id=user.id, log_date=today).first()
-    if not log:
-        log = DailyLog(
-            user_id=user.id,
-            log_date=today,
-            steps=0,
-            calories_burned=0,
-            calories_consumed=0
-        )
-        db.session.add(log)
-        db.session.commit()
+coach_memory = CoachMemory(COACH_MAX_USERS)
 
-    msg = request.args.get("message", "").lower().strip()
+if COACH_CONTEXT_FILE:
+    coach_memory.load(COACH_CONTEXT_FILE)
+    atexit.register(coach_memory.save, COACH_CONTEXT_FILE)
+
+
+def cached_advice(ctx, user, profile, log, scope):
+    # Advice only depends on today's log, targets and scope; recompute when they
+    # change. The memo is one tuple swapped in whole, so concurrent requests
+    # never see a key paired with another request's advice.
+    key = (
+        log.id, log.log_date, log.steps, log.calories_consumed, log.calories_burned,
+        profile.goal, profile.target_steps, profile.target_calories, scope
+    )
+    memo = ctx.advice
+    if memo is not None and memo[0] == key:
+        return memo[1]
+
+    advice = ai_coach_advice(user, profile, log, scope)
+    ctx.advice = (key, advice)
+    return advice
+
+
+def ai_coach_reply(user, profile, log, msg):
+    # Shared by the Flask route and the async route in asgi.py
+    msg = msg.lower().strip()
+    ctx = coach_memory.get(user.id)
 
     greetings = ["hi", "hello", "hey"]
     endings = ["bye", "thanks", "thank you", "ok", "done"]
 
     if msg == "" or msg in greetings:
-        return jsonify({"advice": [
+        return [
             "Hi! I’m your FitTogether AI Coach 👋",
             "I can help with fitness, food, calories, and workouts.",
             "What would you like to work on today?"
-        ]})
+        ]
 
     if msg in endings:
-        return jsonify({"advice": [
+        return [
             "You’re welcome 😊",
             "Take care of your health and come back anytime 💚"
-        ]})
+        ]
 
-    allowed = [
-    "diet", "food", "eat", "workout", "exercise",
-    "steps", "calories", "fitness", "health",
-    "habit", "habits", "daily"
-]
+    words = re.findall(r"[a-z]+", msg)
+    intent, scope = resolve_intent(words, coach_memory.last_intent(ctx))
 
-
-    if not any(w in msg for w in allowed):
-        return jsonify({"advice": [
+    if intent is None:
+        return [
             "I can only help with fitness-related topics 😊",
             "Try asking about diet, calories, or workouts."
-        ]})
+        ]
+
+    coach_memory.remember(ctx, intent)
 
-    if "habit" in msg or "daily" in msg:
-        return jsonify({
-            "advice": [
-                "Healthy daily habits include regular walks, balanced meals, and proper sleep.",
-                "Consistency matters more than intensity.",
-                "Would you like tips on workouts or diet?"
-            ]
-        })
+    if intent == "habit":
+        return [
+            "Healthy daily habits include regular walks, balanced meals, and proper sleep.",
+            "Consistency matters more than intensity.",
+            "Would you like tips on workouts or diet?"
+        ]
 
-    return jsonify({"advice": ai_coach_advice(user, profile, log)})
+    return cached_advice(ctx, user, profile, log, scope)
+
+QUIZ_REQUIRED = [
+    "Please complete your fitness quiz first 📝",
+    "I need your goal and targets to give personal advice."
+]
+
+# =====================================================
+# 🤖 AI COACH ROUTE
+# =====================================================
+@app.route('/ai-coach')
+@login_required
+def ai_coach():
+    user = User.query.get(session['user_id'])
+    profile = user.profile
+
+    if not profile:
+        return jsonify({"advice": QUIZ_REQUIRED}), 409
+
+    log = get_today_log(db.session, user.id)
+
+    msg = request.args.get("message", "")
+    return jsonify({"advice": ai_coach_reply(user, profile, log, msg)})
 
 # =====================================================
 # 🚨 SMART NOTIFICATIONS
@@ -311,17 +363,7 @@ def dashboard():
     profile = user.profile
     today = date.today()
 
-    log = DailyLog.query.filter_by(user_id=user.id, log_date=today).first()
-    if not log:
-        log = DailyLog(
-            user_id=user.id,
-            log_date=today,
-            steps=0,
-            calories_burned=0,
-            calories_consumed=0
-        )
-        db.session.add(log)
-        db.session.commit()
+    log = get_today_log(db.session, user.id)
 
     activities = ActivityLog.query.filter_by(user_id=user.id, log_date=today).all()
 
@@ -353,17 +395,7 @@ def activity():
     user = User.query.get(session['user_id'])
     today = date.today()
 
-    log = DailyLog.query.filter_by(user_id=user.id, log_date=today).first()
-    if not log:
-        log = DailyLog(
-            user_id=user.id,
-            log_date=today,
-            steps=0,
-            calories_burned=0,
-            calories_consumed=0
-        )
-        db.session.add(log)
-        db.session.commit()
+    log = get_today_log(db.session, user.id)
 
     if request.method == 'POST':
         activity = ActivityLog(
@@ -390,19 +422,8 @@ def activity():
 def food():
     user = User.query.get(session['user_id'])
     profile = user.profile
-    today = date.today()
 
-    log = DailyLog.query.filter_by(user_id=user.id, log_date=today).first()
-    if not log:
-        log = DailyLog(
-            user_id=user.id,
-            log_date=today,
-            steps=0,
-            calories_burned=0,
-            calories_consumed=0
-        )
-        db.session.add(log)
-        db.session.commit()
+    log = get_today_log(db.session, user.id)
 
     if request.method == 'POST':
         log.calories_consumed += int(request.form.get('calories', 0))
@@ -0,0 +1,74 @@
+"""
+Memory benchmark for the AI coach context store (coach_memory.py).
+
+Fills the store with --users active users, each with a full intent history
+and the one-scope advice memo ai_coach_reply keeps, then reports the
+tracemalloc footprint. It then pushes 50% more users through to check that
+LRU eviction keeps the store at its cap.
+
+Run with:
+    python bench_coach_memory.py
+    python bench_coach_memory.py --users 100000 --max-users 100000
+Needs only the standard library (no Flask or database).
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import date
+
+from coach_memory import CoachMemory, HISTORY_LEN
+
+INTENTS = ["diet", "workout", "habit", "general"]
+CLOSER = "Stay consistent. Small daily efforts give big results 💪"
+CALORIE_LINE = "You are on track with calories for weight loss."
+
+
+def touch(memory, user_id, today):
+    # Same per-user state ai_coach_reply leaves behind after a busy conversation
+    ctx = memory.get(user_id)
+    for i in range(HISTORY_LEN):
+        memory.remember(ctx, INTENTS[(user_id + i) % len(INTENTS)])
+
+    key = (user_id, today, user_id % 10000, 1800, 300, "lose", 10000, 2100, "general")
+    ctx.advice = (key, [f"Walk {user_id % 10000} more steps today.", CALORIE_LINE, CLOSER])
+
+
+def mb(n):
+    return n / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI coach memory benchmark")
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--max-users", type=int, default=100000)
+    args = parser.parse_args()
+
+    today = date.today()
+    tracemalloc.start()
+    memory = CoachMemory(args.max_users)
+
+    started = time.perf_counter()
+    for user_id in range(args.users):
+        touch(memory, user_id, today)
+    elapsed = time.perf_counter() - started
+
+    current, peak = tracemalloc.get_traced_memory()
+    active = len(memory.contexts)
+    print(f"users filled      : {args.users} in {elapsed:.2f}s")
+    print(f"contexts kept     : {active}")
+    print(f"traced memory     : {mb(current):.1f} MB (peak {mb(peak):.1f} MB)")
+    print(f"per active user   : {current / max(active, 1):.0f} bytes")
+
+    # Push more users through; eviction should hold the store at max_users
+    extra = args.users // 2
+    for user_id in range(args.users, args.users + extra):
+        touch(memory, user_id, today)
+
+    current, peak = tracemalloc.get_traced_memory()
+    print(f"after {extra} more  : {len(memory.contexts)} contexts, "
+          f"{mb(current):.1f} MB (peak {mb(peak):.1f} MB)")
+    assert len(memory.contexts) <= args.max_users
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Bounded per-user conversation memory for the AI coach.
+
+No Flask imports here so bench_coach_memory.py and test_coach_memory.py can
+use it on its own.
+"""
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+HISTORY_LEN = 8
+
+# Checked in order, first match wins. Keywords match word prefixes so
+# "healthy" or "dieting" count, but "great" does not match "eat".
+INTENT_KEYWORDS = [
+    ("habit", ("habit", "daily")),
+    ("diet", ("diet", "food", "eat", "meal", "calori")),
+    ("workout", ("workout", "exercis", "step")),
+    ("general", ("fitness", "health")),
+]
+INTENTS = {intent: intent for intent, _ in INTENT_KEYWORDS}
+
+# Topic-less continuations like "and?", "why?" or "what else" use only these words
+CONTINUATION_WORDS = {"and", "also", "so", "why", "how", "what", "else", "more", "tell", "me"}
+
+# A short follow-up like "and diet?" narrows advice to that topic
+FOLLOW_UP_OPENERS = {"and", "also", "what", "how"}
+FOLLOW_UP_MAX_WORDS = 3
+
+
+def detect_intent(words):
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(w.startswith(keywords) for w in words):
+            return intent
+    return None
+
+
+def resolve_intent(words, previous):
+    """
+    Return (intent, scope) for a message split into lowercase words.
+
+    Standalone questions get the "general" scope (full advice); short
+    follow-ups narrow it to their topic. intent is None when the message is
+    off-topic and not a continuation of the previous one.
+    """
+    intent = detect_intent(words)
+
+    if intent is None:
+        if previous and words and all(w in CONTINUATION_WORDS for w in words):
+            return previous, previous
+        return None, None
+
+    if previous and len(words) <= FOLLOW_UP_MAX_WORDS and words[0] in FOLLOW_UP_OPENERS:
+        return intent, intent
+    return intent, "general"
+
+
+class CoachContext:
+    # A small tuple of interned intent names (no raw messages), plus one
+    # (key, lines) advice memo for the current scope, so each user stays small
+    __slots__ = ("intents", "advice")
+
+    def __init__(self, intents=()):
+        self.intents = tuple(intents)[-HISTORY_LEN:]
+        self.advice = None
+
+
+class CoachMemory:
+    """
+    Per-user coach contexts, LRU-evicted beyond max_users.
+
+    Persistence is per process: each worker loads the file at startup and
+    writes its own contexts back at exit, so with several workers the last
+    one to exit wins.
+    """
+
+    def __init__(self, max_users):
+        self.max_users = max_users
+        self.contexts = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, user_id):
+        with self.lock:
+            ctx = self.contexts.get(user_id)
+            if ctx is None:
+                ctx = self.contexts[user_id] = CoachContext()
+                if len(self.contexts) > self.max_users:
+                    self.contexts.popitem(last=False)
+            else:
+                self.contexts.move_to_end(user_id)
+            return ctx
+
+    def last_intent(self, ctx):
+        intents = ctx.intents
+        return intents[-1] if intents else None
+
+    def remember(self, ctx, intent):
+        # Tuples are replaced, never mutated, so save() always sees a whole one
+        with self.lock:
+            ctx.intents = (ctx.intents + (INTENTS[intent],))[-HISTORY_LEN:]
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            items = data.items()
+        except (OSError, ValueError, AttributeError):
+            logger.exception("Could not load coach memory from %s, starting empty", path)
+            return
+
+        contexts = []
+        for user_id, intents in items:
+            if (not isinstance(intents, list)
+                    or not all(isinstance(i, str) and i in INTENTS for i in intents)):
+                logger.warning("Skipping invalid coach memory entry for user %r", user_id)
+                continue
+            try:
+                user_id = int(user_id)
+            except ValueError:
+                logger.warning("Skipping coach memory entry with bad user id %r", user_id)
+                continue
+            contexts.append((user_id, CoachContext(INTENTS[i] for i in intents)))
+
+        with self.lock:
+            self.contexts.update(contexts)
+            while len(self.contexts) > self.max_users:
+                self.contexts.popitem(last=False)
+
+    def save(self, path):
+        with self.lock:
+            data = {user_id: list(ctx.intents) for user_id, ctx in self.contexts.items()}
+
+        # Write a temp file and swap it in, so a crash never leaves half a file
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            logger.exception("Could not save coach memory to %s", path)
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
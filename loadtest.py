@@ -0,0 +1,131 @@
+"""
+Load test for /ai-coach: compares how many concurrent coach requests the
+sync (gunicorn) and async (uvicorn) modes can hold.
+
+1. Start one of the servers:
+       gunicorn -w 4 -b 127.0.0.1:8000 app:app
+       uvicorn asgi:asgi_app --workers 4 --port 8000
+2. Create a user that has finished the quiz, then run:
+       python loadtest.py --user you@example.com --password secret
+
+Each concurrency level opens that many keep-alive connections, sends
+--rounds requests on each and prints throughput, latency percentiles and
+errors. The client is plain asyncio streams (no HTTP library) so it stays
+cheap enough not to be the bottleneck; an httpx client capped out near
+100 req/s on its own. Results are in the asgi.py docstring. Raise the
+open-file limit (ulimit -n) before testing thousands of connections.
+"""
+import argparse
+import asyncio
+import http.client
+import statistics
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+MESSAGES = ["diet", "and why?", "workout", "what else", "daily habits"]
+TIMEOUT = 60
+
+
+def login(host, port, user, password):
+    # A failed login also sets a session cookie (for the flash message), so
+    # check where it redirects instead
+    conn = http.client.HTTPConnection(host, port, timeout=TIMEOUT)
+    body = urlencode({"email": user, "password": password})
+    conn.request("POST", "/login", body, {"Content-Type": "application/x-www-form-urlencoded"})
+    res = conn.getresponse()
+    location = res.getheader("Location", "")
+    cookie = res.getheader("Set-Cookie", "").split(";", 1)[0]
+    conn.close()
+
+    if res.status != 302 or not location.endswith("/dashboard"):
+        raise SystemExit(f"Login failed (status {res.status})")
+    return cookie
+
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length, close = 0, False
+    while True:
+        line = (await reader.readline()).strip().lower()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"connection" and value.strip() == b"close":
+            close = True
+    await reader.readexactly(length)
+    return status, close
+
+
+async def client(host, port, cookie, rounds, offset, results):
+    conn = None
+    for i in range(rounds):
+        msg = quote(MESSAGES[(offset + i) % len(MESSAGES)])
+        request = (
+            f"GET /ai-coach?message={msg} HTTP/1.1\r\n"
+            f"Host: {host}\r\nCookie: {cookie}\r\n\r\n"
+        ).encode()
+
+        start = time.perf_counter()
+        try:
+            if conn is None:
+                conn = await asyncio.wait_for(asyncio.open_connection(host, port), TIMEOUT)
+            reader, writer = conn
+            writer.write(request)
+            status, close = await asyncio.wait_for(read_response(reader), TIMEOUT)
+            ok = status == 200
+        except (OSError, ValueError, IndexError, asyncio.TimeoutError,
+                asyncio.IncompleteReadError):
+            ok, close = False, True
+        results.append((time.perf_counter() - start, ok))
+
+        # gunicorn's sync workers close after every response
+        if close and conn is not None:
+            conn[1].close()
+            conn = None
+
+    if conn is not None:
+        conn[1].close()
+
+
+async def run_level(host, port, cookie, concurrency, rounds):
+    results = []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(host, port, cookie, rounds, i, results)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(t for t, ok in results if ok)
+    errors = sum(1 for _, ok in results if not ok)
+    if not latencies:
+        print(f"{concurrency:>6} | all {errors} requests failed")
+        return
+
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{concurrency:>6} | {len(latencies) / elapsed:>8.1f} req/s | "
+          f"p50 {p50:>7.1f} ms | p95 {p95:>7.1f} ms | errors {errors}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--user", required=True, help="email or username")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--levels", default="10,100,500,1000,2000",
+                        help="comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    url = urlsplit(args.url)
+    host, port = url.hostname, url.port or 80
+    cookie = login(host, port, args.user, args.password)
+
+    print(f"Load testing {args.url}/ai-coach")
+    for level in map(int, args.levels.split(",")):
+        await run_level(host, port, cookie, level, args.rounds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
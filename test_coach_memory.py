@@ -0,0 +1,127 @@
+import json
+import re
+
+import pytest
+
+from coach_memory import CoachMemory, HISTORY_LEN, resolve_intent
+
+
+def words(msg):
+    # Same tokenising as ai_coach_reply
+    return re.findall(r"[a-z]+", msg.lower())
+
+
+# ---------------- LRU EVICTION ----------------
+def test_evicts_least_recently_used_at_cap():
+    memory = CoachMemory(max_users=3)
+    for user_id in (1, 2, 3):
+        memory.get(user_id)
+
+    memory.get(1)          # 1 is now the most recent
+    memory.get(4)          # pushes out 2
+
+    assert list(memory.contexts) == [3, 1, 4]
+
+
+def test_history_is_bounded():
+    memory = CoachMemory(max_users=10)
+    ctx = memory.get(1)
+    for _ in range(HISTORY_LEN + 5):
+        memory.remember(ctx, "diet")
+    memory.remember(ctx, "workout")
+
+    assert len(ctx.intents) == HISTORY_LEN
+    assert memory.last_intent(ctx) == "workout"
+
+
+# ---------------- PERSISTENCE ----------------
+def test_save_load_round_trip(tmp_path):
+    path = tmp_path / "coach.json"
+    memory = CoachMemory(max_users=10)
+    memory.remember(memory.get(1), "diet")
+    memory.remember(memory.get(2), "habit")
+    memory.save(str(path))
+
+    loaded = CoachMemory(max_users=10)
+    loaded.load(str(path))
+
+    assert loaded.contexts[1].intents == ("diet",)
+    assert loaded.contexts[2].intents == ("habit",)
+
+
+def test_load_respects_cap(tmp_path):
+    path = tmp_path / "coach.json"
+    path.write_text(json.dumps({str(i): ["diet"] for i in range(5)}))
+
+    memory = CoachMemory(max_users=2)
+    memory.load(str(path))
+
+    assert list(memory.contexts) == [3, 4]
+
+
+@pytest.mark.parametrize("content", ['{"1": ["diet"', "[1, 2]", ""])
+def test_corrupt_file_starts_empty(tmp_path, content):
+    path = tmp_path / "coach.json"
+    path.write_text(content)
+
+    memory = CoachMemory(max_users=10)
+    memory.load(str(path))
+
+    assert len(memory.contexts) == 0
+
+
+def test_invalid_entries_are_skipped(tmp_path):
+    path = tmp_path / "coach.json"
+    path.write_text(json.dumps({
+        "1": "diet",
+        "2": ["diet", "sleep"],
+        "x": ["diet"],
+        "3": ["workout"],
+    }))
+
+    memory = CoachMemory(max_users=10)
+    memory.load(str(path))
+
+    assert list(memory.contexts) == [3]
+
+
+def test_save_to_missing_dir_logs_instead_of_raising(tmp_path, caplog):
+    memory = CoachMemory(max_users=10)
+    memory.remember(memory.get(1), "diet")
+
+    memory.save(str(tmp_path / "missing" / "coach.json"))
+
+    assert "Could not save coach memory" in caplog.text
+
+
+# ---------------- INTENT RESOLUTION ----------------
+@pytest.mark.parametrize("msg, intent", [
+    ("how to be healthy", "general"),
+    ("tips for dieting", "diet"),
+    ("what should i eat", "diet"),
+    ("exercising at home", "workout"),
+    ("best workouts", "workout"),
+    ("daily habits", "habit"),
+    ("i feel great", None),
+])
+def test_standalone_questions(msg, intent):
+    expected_scope = "general" if intent else None
+    assert resolve_intent(words(msg), None) == (intent, expected_scope)
+
+
+@pytest.mark.parametrize("msg, expected", [
+    ("and diet?", ("diet", "diet")),
+    ("what about food", ("diet", "diet")),
+    ("what else", ("workout", "workout")),
+    ("and why?", ("workout", "workout")),
+    ("what about sleep?", (None, None)),
+    ("android app?", (None, None)),
+    ("moreover the rain", (None, None)),
+    ("how many steps to lose fat", ("workout", "general")),
+])
+def test_follow_ups(msg, expected):
+    assert resolve_intent(words(msg), "workout") == expected
+
+
+def test_continuation_without_history_is_off_topic():
+    assert resolve_intent(words("and?"), None) == (None, None)